@@ -2,6 +2,12 @@ import os
 import numpy as np
 import copy
 import sys
+import time
+import argparse
+import random
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 def load_sudoku(puzzle_path):
     ''' Load the sudoku from the given path; it returns the sudoku as a list of lists
@@ -287,6 +293,97 @@ def get_next_position_to_fill(sudoku, x, y, mrv_on, **kwargs):
                 
         return 10,10
 
+'''
+Cache of the related variables (row, column and box) of every variable x,y
+'''
+peers_cache = {}
+
+def get_peers(x,y):
+    if (x,y) not in peers_cache:
+        peers = []
+        for k in range(0,9):
+            if k != y:
+                peers.append((x,k))
+            if k != x:
+                peers.append((k,y))
+        startRow, startCol = get_start_box_variable(x,y)
+        for i in range(0,3):
+            for j in range(0,3):
+                if startRow+i != x and startCol+j != y:
+                    peers.append((startRow+i,startCol+j))
+        peers_cache[(x,y)] = peers
+    return peers_cache[(x,y)]
+
+def count_constrained_peers(domain, fixed, x, y, val):
+    ''' Count the unassigned related variables of x,y that still have val in their domain
+        input: domain: the domains of all the variables
+               fixed: the assigned variables
+               x: row number
+               y: column number
+               val: value to be checked
+        output: count: number of domain values that assigning val to x,y would remove
+    '''
+    count = 0
+    for peer_x, peer_y in get_peers(x,y):
+        if not fixed[peer_x][peer_y] and val in domain[peer_x][peer_y]:
+            count = count+1
+    return count
+
+def get_value_order(sudoku, x, y, **kwargs):
+    ''' Get the order in which the values are tried for the position (x, y)
+        input: sudoku: the sudoku to be solved
+               x: row number
+               y: column number
+               kwargs: other keyword arguments
+        output: values: values in ascending order, or the values in the domain
+                ordered by the least constraining value heuristic if lcv_on is set
+    '''
+    if not kwargs.get("lcv_on", False):
+        return range(9)
+
+    domain = kwargs["domain"]
+    fixed = kwargs["fixed"]
+    rng = kwargs.get("rng")
+    scored_values = []
+    for val in domain[x][y]:
+        count = count_constrained_peers(domain, fixed, x, y, val)
+        #Ties are broken randomly for randomized restarts, otherwise on the smaller value
+        tie_breaker = rng.random() if rng is not None else val
+        scored_values.append((count, tie_breaker, val))
+    scored_values.sort()
+    return [element[2] for element in scored_values]
+
+def count_search_node(**kwargs):
+    ''' Count a node of the search where a guess is made
+        input: kwargs: other keyword arguments
+        output: True if the search can go on, False if the node cutoff is reached
+    '''
+    search_stats = kwargs.get("search_stats")
+    if search_stats is None:
+        return True
+    search_stats["nodes"] += 1
+    return not is_search_cut_off(**kwargs)
+
+def is_search_cut_off(**kwargs):
+    ''' Check if the search has made guesses at more nodes than the node cutoff allows
+        input: kwargs: other keyword arguments
+        output: True if the search has to stop, False otherwise
+    '''
+    search_stats = kwargs.get("search_stats")
+    if search_stats is None or search_stats["node_limit"] is None:
+        return False
+    return search_stats["nodes"] > search_stats["node_limit"]
+
+def change_guess_depth(change, **kwargs):
+    ''' Change the number of guesses on the path to the current node of the search
+        input: change: 1 when the search enters a guess, -1 when it leaves it
+               kwargs: other keyword arguments
+        output: None
+    '''
+    search_stats = kwargs.get("search_stats")
+    if search_stats is not None:
+        search_stats["depth"] += change
+
 def solve_sudoku(sudoku, x, y, mrv_on, list_of_waterfalls, **kwargs):
     '''' Solve the sudoku using the given waterfall methods with/without mrv
         input: sudoku: the sudoku to be solved
@@ -305,6 +402,9 @@ def solve_sudoku(sudoku, x, y, mrv_on, list_of_waterfalls, **kwargs):
     fixed = kwargs["fixed"]
     if isSolved(sudoku):
         return True, sudoku, 0
+    #Give up on this node if the node cutoff of the search is reached
+    if is_search_cut_off(**kwargs):
+        return False, sudoku, 0
     #Apply the waterfalls; change the kwargs with your own
     isPoss, changes = apply_waterfall_methods(sudoku, list_of_waterfalls, **kwargs)
 
@@ -332,16 +432,27 @@ def solve_sudoku(sudoku, x, y, mrv_on, list_of_waterfalls, **kwargs):
     
 
 
+    value_order = get_value_order(sudoku, x, y, **kwargs)
     no_cur_guess = 0
     #Check how many guesses are possible for the current position
-    for i in range(9):
+    for i in value_order:
         if isPossible(sudoku, x, y, i, **kwargs):
             no_cur_guess += 1
         
     if no_cur_guess == 0:
         return False, sudoku, 0
 
-    for i in range(9):
+    #A position with more than one possible value is a guess; the values tried here are one guess deeper
+    is_guess = no_cur_guess > 1
+    if is_guess:
+        change_guess_depth(1, **kwargs)
+        #Only guesses count towards the node cutoff, forced positions are always filled
+        count_search_node(**kwargs)
+
+    for i in value_order:
+        #Stop trying values once the node cutoff of the search is reached
+        if is_search_cut_off(**kwargs):
+            break
         #Check if the value is possible at the current position
         if isPossible(sudoku, x, y, i, **kwargs):
             #If the value is possible, then update the changes for the current position
@@ -355,10 +466,14 @@ def solve_sudoku(sudoku, x, y, mrv_on, list_of_waterfalls, **kwargs):
 
             #If the sudoku is solved, then return True, else undo the changes for the current position
             if isSolved(sudoku):
+                if is_guess:
+                    change_guess_depth(-1, **kwargs)
                 return True, sudoku, no_cur_guess - 1
             else:
                 undo_changes_for_position(sudoku, x, y, i, **kwargs)
     
+    if is_guess:
+        change_guess_depth(-1, **kwargs)
     #If the sudoku cannot solved at current partially filled state, then undo the changes made by the waterfalls and return False
     undo_waterfall_changes(sudoku, changes, **kwargs)
     return False, sudoku, no_cur_guess - 1
@@ -681,7 +796,10 @@ def get_initial_kwargs(sudoku, mrv_on, **kwargs):
 
             row_domain.append(domain_element)
 
-    kwargs = {"domain":initial_domain, "fixed":initial_fixed, "saved_domains":initial_saved}
+    initial_stats = {"nodes":0, "node_limit":kwargs.get("node_limit"), "depth":0}
+
+    kwargs = {"domain":initial_domain, "fixed":initial_fixed, "saved_domains":initial_saved,
+              "search_stats":initial_stats, "lcv_on":kwargs.get("lcv_on", False), "rng":kwargs.get("rng")}
     return kwargs
 
 def solve_plain_backtracking(original_sudoku):
@@ -722,6 +840,564 @@ def solve_with_addition_of_waterfall2(original_sudoku):
     ini_x, ini_y = get_next_position_to_fill(sudoku, -1, -1, True, **kwargs)
     return solve_sudoku(sudoku, ini_x, ini_y, True, all_waterfalls, **kwargs)
 
+def solve_with_lcv(original_sudoku):
+    '''Solve the sudoku using mrv and least constraining value heuristics with ac3 and waterfall1 waterfall methods.'''
+    sudoku = copy.deepcopy(original_sudoku)
+    all_waterfalls = [ac3_waterfall, waterfall1]
+    kwargs = get_initial_kwargs(sudoku, True, lcv_on=True)
+    ini_x, ini_y = get_next_position_to_fill(sudoku, -1, -1, True, **kwargs)
+    return solve_sudoku(sudoku, ini_x, ini_y, True, all_waterfalls, **kwargs)
+
+def solve_with_restarts(original_sudoku, list_of_waterfalls=None, node_limit=50, max_restarts=10, seed=None):
+    ''' Solve the sudoku using mrv and randomized least constraining value ordering with restarts
+        input: original_sudoku: the sudoku to be solved
+               list_of_waterfalls: list of waterfalls to be applied; ac3 and waterfall1 if None
+               node_limit: maximum number of nodes with a guess in the first attempt; it is doubled
+               after every restart and None means no cutoff
+               max_restarts: number of restarts with a node cutoff; the last attempt has no cutoff
+               seed: seed for the random tie breaking between equally constraining values
+        output: True if solved, False otherwise
+                sudoku: the solved sudoku
+                guess: number of guesses made over all the attempts
+    '''
+    if list_of_waterfalls is None:
+        list_of_waterfalls = [ac3_waterfall, waterfall1]
+    rng = random.Random(seed)
+    total_guesses = 0
+    for attempt in range(max_restarts+1):
+        #The last attempt runs without cutoff so that the search stays complete
+        if attempt == max_restarts:
+            node_limit = None
+        sudoku = copy.deepcopy(original_sudoku)
+        kwargs = get_initial_kwargs(sudoku, True, lcv_on=True, rng=rng, node_limit=node_limit)
+        ini_x, ini_y = get_next_position_to_fill(sudoku, -1, -1, True, **kwargs)
+        solved, sudoku, guesses = solve_sudoku(sudoku, ini_x, ini_y, True, list_of_waterfalls, **kwargs)
+        total_guesses += guesses
+        if solved or not is_search_cut_off(**kwargs):
+            return solved, sudoku, total_guesses
+        if node_limit is not None:
+            node_limit = node_limit*2
+    return False, sudoku, total_guesses
+
+#Waterfall methods that can be stored by name in a search frontier
+WATERFALL_METHODS = {
+    "ac3_waterfall": ac3_waterfall,
+    "waterfall1": waterfall1,
+    "waterfall2": waterfall2,
+}
+
+'''
+Encode the sudoku as a string of 81 characters in the format of the puzzle
+files, i.e. 1-9 for the values and - for an empty cell
+'''
+def encode_grid(sudoku):
+    return "".join(str(val+1) if val != -1 else "-" for row in sudoku for val in row)
+
+'''
+Decode the string created by encode_grid back to the sudoku as a list of lists
+'''
+def decode_grid(grid):
+    cells = [ord(x) - ord('1') if x.isdigit() else -1 for x in grid]
+    return [cells[i*9:(i+1)*9] for i in range(9)]
+
+def get_search_state(sudoku, depth, **kwargs):
+    ''' Get a compact, serializable state of a node of the search
+        input: sudoku: the partially filled sudoku
+               depth: number of guesses made to reach this node
+               kwargs: other keyword arguments
+        output: state: dict with the grid as string and the domains as bitmasks
+    '''
+    domain = kwargs["domain"]
+    domains = []
+    for x in range(9):
+        for y in range(9):
+            mask = 0
+            for val in domain[x][y]:
+                mask |= 1 << val
+            domains.append(mask)
+    return {"grid":encode_grid(sudoku), "domains":domains, "depth":depth}
+
+def restore_search_state(state, lcv_on=False):
+    ''' Restore the sudoku and the kwargs of a node saved by get_search_state
+        input: state: the saved state
+               lcv_on: whether to use the least constraining value heuristic
+        output: sudoku: the partially filled sudoku
+                kwargs: the kwargs to be passed to the solve functions
+    '''
+    sudoku = decode_grid(state["grid"])
+    kwargs = get_initial_kwargs(sudoku, True, lcv_on=lcv_on)
+    domain = kwargs["domain"]
+    for x in range(9):
+        for y in range(9):
+            mask = state["domains"][x*9+y]
+            domain[x][y] = [val for val in range(9) if mask & (1 << val)]
+    return sudoku, kwargs
+
+def create_search_frontier(original_sudoku, list_of_waterfalls, lcv_on=False, count_solutions=False):
+    ''' Create the frontier of a resumable search for the given sudoku
+        input: original_sudoku: the sudoku to be solved
+               list_of_waterfalls: list of waterfalls to be applied
+               lcv_on: whether to use the least constraining value heuristic
+               count_solutions: if True, the search goes on after a solution to count all the solutions
+        output: frontier: dict with the search settings, the pending nodes and the statistics
+    '''
+    sudoku = copy.deepcopy(original_sudoku)
+    kwargs = get_initial_kwargs(sudoku, True)
+    frontier = {"waterfalls":[waterfall.__name__ for waterfall in list_of_waterfalls],
+                "lcv_on":lcv_on,
+                "count_solutions":count_solutions,
+                "pending":[get_search_state(sudoku, 0, **kwargs)],
+                "nodes":0,
+                "guesses":0,
+                "solution":None,
+                "solution_count":0}
+    return frontier
+
+def expand_search_state(state, list_of_waterfalls, lcv_on=False):
+    ''' Expand a node of the search: apply the waterfalls and branch on the mrv position
+        input: state: the node to be expanded
+               list_of_waterfalls: list of waterfalls to be applied
+               lcv_on: whether to use the least constraining value heuristic
+        output: solution: the solved sudoku if the node is a solution, None otherwise
+                children: the nodes for the values of the mrv position, in the order they should be tried
+    '''
+    sudoku, kwargs = restore_search_state(state, lcv_on)
+    if isSolved(sudoku):
+        return sudoku, []
+
+    isPoss, changes = apply_waterfall_methods(sudoku, list_of_waterfalls, **kwargs)
+    if not isPoss:
+        return None, []
+
+    x, y = get_mrv_position(sudoku, **kwargs)
+    if x == 10:
+        return None, []
+
+    values = [val for val in get_value_order(sudoku, x, y, **kwargs) if isPossible(sudoku, x, y, val, **kwargs)]
+    #Only a position with more than one possible value is a guess
+    depth = state["depth"]+1 if len(values) > 1 else state["depth"]
+
+    children = []
+    for val in values:
+        child_sudoku = copy.deepcopy(sudoku)
+        child_kwargs = copy.deepcopy(kwargs)
+        update_changes_for_position(child_sudoku, x, y, val, **child_kwargs)
+        children.append(get_search_state(child_sudoku, depth, **child_kwargs))
+    return None, children
+
+def run_search_frontier(frontier, node_budget=None):
+    ''' Continue the depth first search of the frontier
+        input: frontier: the frontier created by create_search_frontier or load_search_frontier
+               node_budget: maximum number of nodes to expand before returning; None to run until done
+        output: frontier: the same frontier, updated in place; the search is finished when
+                a solution is found or there are no pending nodes left
+    '''
+    #Without waterfalls the guesses are the same as for solve_sudoku with mrv. With waterfalls
+    #this search can make fewer guesses: every node is restored with exactly its own domains, while
+    #backtracking in solve_sudoku (undo_changes_for_position rebuilds domains from the grid and
+    #undo_waterfall_changes appends values back) can leave values the waterfalls had removed
+    list_of_waterfalls = [WATERFALL_METHODS[name] for name in frontier["waterfalls"]]
+    pending = frontier["pending"]
+    expanded = 0
+    while not is_search_finished(frontier):
+        if node_budget is not None and expanded >= node_budget:
+            break
+        state = pending.pop()
+        solution, children = expand_search_state(state, list_of_waterfalls, frontier["lcv_on"])
+        expanded = expanded+1
+        frontier["nodes"] += 1
+        if solution is not None:
+            frontier["solution_count"] += 1
+            #In counting mode the first solution is kept and the search goes on
+            if frontier["solution"] is None:
+                frontier["solution"] = encode_grid(solution)
+        if len(children) > 1:
+            frontier["guesses"] += len(children)-1
+        #The pending nodes are used as a stack, so push the first value to try last
+        pending.extend(reversed(children))
+    return frontier
+
+def is_search_finished(frontier):
+    if frontier["solution"] is not None and not frontier["count_solutions"]:
+        return True
+    return len(frontier["pending"]) == 0
+
+def expand_search_frontier(frontier, split_depth):
+    ''' Expand the pending nodes of the frontier until every pending node has made split_depth guesses
+        input: frontier: the frontier to be expanded
+               split_depth: number of mrv levels with more than one value to expand
+        output: frontier: the same frontier, updated in place
+    '''
+    list_of_waterfalls = [WATERFALL_METHODS[name] for name in frontier["waterfalls"]]
+    while not is_search_finished(frontier):
+        #Walk over the nodes in the order the depth first search would take them, so that the
+        #expanded frontier keeps that order
+        expanded_pending = []
+        any_expanded = False
+        for state in reversed(frontier["pending"]):
+            if is_search_finished(frontier) or state["depth"] >= split_depth:
+                expanded_pending.append(state)
+                continue
+            any_expanded = True
+            solution, children = expand_search_state(state, list_of_waterfalls, frontier["lcv_on"])
+            frontier["nodes"] += 1
+            if solution is not None:
+                frontier["solution_count"] += 1
+                if frontier["solution"] is None:
+                    frontier["solution"] = encode_grid(solution)
+            if len(children) > 1:
+                frontier["guesses"] += len(children)-1
+            expanded_pending += children
+        frontier["pending"] = list(reversed(expanded_pending))
+        if not any_expanded:
+            break
+    return frontier
+
+def split_search_frontier(frontier, parts, keep_totals=True):
+    ''' Split the pending nodes of the frontier into independent frontiers
+        input: frontier: the frontier to be split
+               parts: maximum number of frontiers to create
+               keep_totals: if True, the first frontier carries the statistics and the solution found so
+               far, so that summing the statistics of all the resumed frontiers gives the right totals
+        output: frontiers: list of frontiers with the same settings that together hold all the pending nodes
+    '''
+    parts = max(1, min(parts, len(frontier["pending"])))
+    frontiers = []
+    for part in range(parts):
+        frontiers.append({"waterfalls":list(frontier["waterfalls"]),
+                          "lcv_on":frontier["lcv_on"],
+                          "count_solutions":frontier["count_solutions"],
+                          "pending":frontier["pending"][part::parts],
+                          "nodes":0,
+                          "guesses":0,
+                          "solution":None,
+                          "solution_count":0})
+    if keep_totals:
+        for key in ["nodes", "guesses", "solution", "solution_count"]:
+            frontiers[0][key] = frontier[key]
+    return frontiers
+
+def search_subproblem(frontier, stop_event):
+    ''' Run the search of a subproblem in a worker process
+        input: frontier: frontier holding the subproblem
+               stop_event: event set by the main process once the remaining work can be dropped
+        output: frontier: the searched frontier
+    '''
+    while not is_search_finished(frontier) and not stop_event.is_set():
+        run_search_frontier(frontier, 8)
+    return frontier
+
+def run_parallel_search(frontier, processes=None, split_depth=3):
+    ''' Run the search of the frontier on a pool of processes
+        input: frontier: the frontier created by create_search_frontier or load_search_frontier
+               processes: number of worker processes; None to use one per cpu
+               split_depth: number of mrv levels to expand before the subproblems are handed out
+        output: frontier: the same frontier, updated in place with the solution and the
+                statistics of all the workers; it has no pending nodes left
+    '''
+    expand_search_frontier(frontier, split_depth)
+    if is_search_finished(frontier):
+        return frontier
+
+    #Every pending node is a separate subproblem, in the order the depth first search would take them;
+    #the totals stay on the frontier and the results of the workers are added to them
+    subproblems = split_search_frontier(frontier, len(frontier["pending"]), keep_totals=False)
+    subproblems.reverse()
+    frontier["pending"] = []
+
+    with multiprocessing.Manager() as manager:
+        stop_event = manager.Event()
+        executor = ProcessPoolExecutor(processes)
+        try:
+            futures = [executor.submit(search_subproblem, subproblem, stop_event) for subproblem in subproblems]
+            for future in as_completed(futures):
+                result = future.result()
+                frontier["nodes"] += result["nodes"]
+                frontier["guesses"] += result["guesses"]
+                frontier["solution_count"] += result["solution_count"]
+                if result["solution"] is not None and frontier["solution"] is None:
+                    frontier["solution"] = result["solution"]
+                #Once a solution is found the work of the other workers is no longer needed
+                if frontier["solution"] is not None and not frontier["count_solutions"]:
+                    stop_event.set()
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return frontier
+
+def solve_in_parallel(original_sudoku, list_of_waterfalls=None, processes=None, split_depth=3):
+    ''' Solve the sudoku by searching the subproblems below the first mrv levels in parallel
+        input: original_sudoku: the sudoku to be solved
+               list_of_waterfalls: list of waterfalls to be applied; ac3 and waterfall1 if None
+               processes: number of worker processes; None to use one per cpu
+               split_depth: number of mrv levels to expand before the subproblems are handed out
+        output: True if solved, False otherwise
+                sudoku: the solved sudoku
+                guess: number of guesses made by all the workers
+    '''
+    if list_of_waterfalls is None:
+        list_of_waterfalls = [ac3_waterfall, waterfall1]
+    frontier = create_search_frontier(original_sudoku, list_of_waterfalls)
+    run_parallel_search(frontier, processes, split_depth)
+    if frontier["solution"] is None:
+        return False, copy.deepcopy(original_sudoku), frontier["guesses"]
+    return True, decode_grid(frontier["solution"]), frontier["guesses"]
+
+def count_solutions_in_parallel(original_sudoku, list_of_waterfalls=None, processes=None, split_depth=3):
+    ''' Count all the solutions of the sudoku by searching the subproblems in parallel
+        input: original_sudoku: the sudoku to be solved
+               list_of_waterfalls: list of waterfalls to be applied; ac3 and waterfall1 if None
+               processes: number of worker processes; None to use one per cpu
+               split_depth: number of mrv levels to expand before the subproblems are handed out
+        output: count: number of solutions of the sudoku
+    '''
+    if list_of_waterfalls is None:
+        list_of_waterfalls = [ac3_waterfall, waterfall1]
+    frontier = create_search_frontier(original_sudoku, list_of_waterfalls, count_solutions=True)
+    run_parallel_search(frontier, processes, split_depth)
+    return frontier["solution_count"]
+
+def save_search_frontier(frontier, path):
+    with open(path, 'w') as frontier_f:
+        json.dump(frontier, frontier_f, separators=(",", ":"))
+
+def load_search_frontier(path):
+    with open(path, 'r') as frontier_f:
+        frontier = json.load(frontier_f)
+    #Snapshots saved before counting mode was added have no counting fields
+    frontier.setdefault("count_solutions", False)
+    frontier.setdefault("solution_count", 0)
+    return frontier
+
+def create_session(original_sudoku):
+    ''' Create an editing session for the sudoku, e.g. for an interactive ui
+        input: original_sudoku: the sudoku with the given values
+        output: session: dict with the current sudoku, the given values, the kwargs with
+                the domains kept up to date on every edit and the cached search result
+    '''
+    sudoku = copy.deepcopy(original_sudoku)
+    kwargs = get_initial_kwargs(sudoku, True)
+    session = {"sudoku":sudoku,
+               "givens":[[val != -1 for val in row] for row in sudoku],
+               "kwargs":kwargs,
+               "solution":None,
+               "unsolvable":False}
+    return session
+
+def session_place_digit(session, x, y, val):
+    ''' Place the value(val) at the given position (x, y) and update the domains of the related variables
+        input: session: the session created by create_session
+               x: row number
+               y: column number
+               val: value to be placed
+        output: True if placed, False if the position is a given or the value is not possible there;
+                the session is left unchanged then
+    '''
+    sudoku = session["sudoku"]
+    kwargs = session["kwargs"]
+    if session["givens"][x][y]:
+        return False
+    if sudoku[x][y] == val:
+        return True
+
+    #A value already at the position is removed first, as the new value is checked against the
+    #domain without it; if the new value is not possible the old value is put back
+    old_val = sudoku[x][y]
+    unsolvable = session["unsolvable"]
+    if old_val != -1:
+        session_remove_digit(session, x, y)
+    if not isPossible(sudoku, x, y, val, **kwargs):
+        if old_val != -1:
+            update_changes_for_position(sudoku, x, y, old_val, **kwargs)
+            session["unsolvable"] = unsolvable
+        return False
+
+    update_changes_for_position(sudoku, x, y, val, **kwargs)
+    #The cached solution is only valid as long as the placed values agree with it
+    if session["solution"] is not None and session["solution"][x][y] != val:
+        session["solution"] = None
+    return True
+
+def session_remove_digit(session, x, y):
+    ''' Remove the value at the given position (x, y) and give the related variables their values back
+        input: session: the session created by create_session
+               x: row number
+               y: column number
+        output: True if removed, False if the position is a given or empty
+    '''
+    sudoku = session["sudoku"]
+    if session["givens"][x][y] or sudoku[x][y] == -1:
+        return False
+
+    undo_changes_for_position(sudoku, x, y, sudoku[x][y], **session["kwargs"])
+    #A cached solution stays valid, but an unsolvable sudoku may have become solvable
+    session["unsolvable"] = False
+    return True
+
+def session_get_candidates(session, x, y):
+    ''' Get the values that can still be placed at the given position (x, y)
+        input: session: the session created by create_session
+               x: row number
+               y: column number
+        output: values: the sorted domain of the position, empty if the position is filled
+    '''
+    if session["sudoku"][x][y] != -1:
+        return []
+    return sorted(session["kwargs"]["domain"][x][y])
+
+def session_is_solvable(session):
+    ''' Check if the sudoku of the session can still be completed
+        input: session: the session created by create_session
+        output: True if solvable, False otherwise
+    '''
+    sudoku = session["sudoku"]
+    kwargs = session["kwargs"]
+    if session["solution"] is not None:
+        return True
+    if session["unsolvable"]:
+        return False
+
+    #An empty position without values left is a quick no
+    x, y = get_mrv_position(sudoku, **kwargs)
+    if x != 10 and len(kwargs["domain"][x][y]) == 0:
+        session["unsolvable"] = True
+        return False
+
+    #Search on copies starting from the current domains, so they need not be built again
+    search_sudoku = copy.deepcopy(sudoku)
+    search_kwargs = copy.deepcopy(kwargs)
+    if x == 10:
+        solved = isSolved(search_sudoku)
+    else:
+        solved, search_sudoku, guesses = solve_sudoku(search_sudoku, x, y, True, [], **search_kwargs)
+
+    if solved:
+        session["solution"] = search_sudoku
+    else:
+        session["unsolvable"] = True
+    return solved
+
+def session_get_hint(session):
+    ''' Get a hint for the sudoku of the session
+        input: session: the session created by create_session
+        output: (x, y, val) with the value of the most constrained empty position,
+                None if the sudoku is complete or cannot be solved
+    '''
+    if not session_is_solvable(session):
+        return None
+    x, y = get_mrv_position(session["sudoku"], **session["kwargs"])
+    if x == 10:
+        return None
+    return x, y, session["solution"][x][y]
+
+
+#Solve methods that can be selected by name from the command line
+SOLVE_METHODS = {
+    "backtracking": solve_plain_backtracking,
+    "mrv": solve_with_mrv,
+    "ac3": solve_with_ac3,
+    "waterfall1": solve_with_addition_of_waterfall1,
+    "lcv": solve_with_lcv,
+    "restarts": solve_with_restarts,
+}
+
+def create_profile_hook(profile):
+    ''' Create a sys.setprofile hook that times the functions of this module
+        input: profile: dict with "stacks", "phases" and "depths" to be filled in
+        output: hook: the function to be passed to sys.setprofile
+    '''
+    module_file = create_profile_hook.__code__.co_filename
+    stacks = profile["stacks"]
+    phases = profile["phases"]
+    depths = profile["depths"]
+    #Each entry is [function name, start time, time spent in profiled children, guess depth]
+    call_stack = []
+
+    def hook(frame, event, arg):
+        #Only python level calls of this module are tracked; the time spent in
+        #library calls is counted as the self time of the calling function
+        if frame.f_code.co_filename != module_file:
+            return
+        if event == "call":
+            name = frame.f_code.co_name
+            depth = call_stack[-1][3] if len(call_stack) > 0 else 0
+            #The guess depth is tracked by solve_sudoku in the search_stats of its kwargs, so
+            #forced positions with a single value do not add a level
+            if name == "solve_sudoku":
+                search_stats = frame.f_locals.get("kwargs", {}).get("search_stats")
+                if search_stats is not None:
+                    depth = search_stats["depth"]
+            call_stack.append([name, time.perf_counter(), 0.0, depth])
+        elif event == "return" and len(call_stack) > 0:
+            name, start, child_time, depth = call_stack.pop()
+            total_time = time.perf_counter() - start
+            self_time = total_time - child_time
+            names = [element[0] for element in call_stack]
+
+            key = ";".join(names + [name])
+            stacks[key] = stacks.get(key, 0.0) + self_time
+
+            #Recursive calls are already inside the time of the outermost call
+            if name not in names:
+                phases[name] = phases.get(name, 0.0) + total_time
+
+            depths[depth] = depths.get(depth, 0.0) + self_time
+
+            if len(call_stack) > 0:
+                call_stack[-1][2] += total_time
+
+    return hook
+
+def profile_solve(solve_function, original_sudoku, flamegraph_path=None):
+    ''' Solve the sudoku with the given solve method while timing every solver phase
+        input: solve_function: one of the solve methods, e.g. solve_with_ac3
+               original_sudoku: the sudoku to be solved
+               flamegraph_path: if given, the collapsed stacks are written to this file
+        output: result: the (solved, sudoku, guesses) tuple of the solve method
+                profile: dict with "stacks" (collapsed stack -> self seconds),
+                "phases" (function -> inclusive seconds), "depths" (guesses on the search path -> self seconds)
+                and "total" (wall clock seconds of the solve)
+    '''
+    profile = {"stacks":{}, "phases":{}, "depths":{}, "total":0.0}
+    hook = create_profile_hook(profile)
+
+    start = time.perf_counter()
+    sys.setprofile(hook)
+    try:
+        result = solve_function(original_sudoku)
+    finally:
+        sys.setprofile(None)
+    profile["total"] = time.perf_counter() - start
+
+    if flamegraph_path is not None:
+        write_collapsed_stacks(profile, flamegraph_path)
+    return result, profile
+
+def write_collapsed_stacks(profile, output_path):
+    ''' Write the profiled stacks in the collapsed format used by flamegraph.pl and speedscope
+        input: profile: the profile returned by profile_solve
+               output_path: path of the file to write
+        output: None
+    '''
+    with open(output_path, 'w') as output_f:
+        for stack, seconds in sorted(profile["stacks"].items()):
+            #Flame graph tools expect integer sample counts, so use microseconds
+            microseconds = int(seconds * 1000000)
+            if microseconds > 0:
+                output_f.write(stack + " " + str(microseconds) + "\n")
+
+def print_profile(profile):
+    ''' Print the time spent per solver phase and per guess depth of the search
+        input: profile: the profile returned by profile_solve
+        output: None
+    '''
+    print("total time: %.4fs" % profile["total"])
+    print("time per phase (inclusive):")
+    for name, seconds in sorted(profile["phases"].items(), key=lambda item: -item[1]):
+        print("  %-40s %.4fs" % (name, seconds))
+    print("time per guess depth (self):")
+    for depth, seconds in sorted(profile["depths"].items()):
+        print("  depth %-3d %.4fs" % (depth, seconds))
 
 
 def solve_one_puzzle(puzzle_path):
@@ -763,6 +1439,74 @@ def solve_all_sudoku():
         #print("with waterfall2 guesses: ", waterfall2_guesses)
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Solve the sudoku puzzles in the puzzles folder")
+    parser.add_argument("--profile", metavar="PUZZLE",
+                        help="profile a single solve of the given puzzle instead of solving all puzzles")
+    parser.add_argument("--method", choices=sorted(SOLVE_METHODS), default="waterfall1",
+                        help="solve method to use for a single puzzle")
+    parser.add_argument("--flamegraph", metavar="PATH",
+                        help="write the profiled stacks in collapsed format to PATH")
+    parser.add_argument("--search", metavar="PUZZLE",
+                        help="solve the given puzzle with the resumable search (mrv, ac3 and waterfall1)")
+    parser.add_argument("--resume", metavar="PATH",
+                        help="resume the search from the snapshot at PATH")
+    parser.add_argument("--node-budget", type=int, metavar="N",
+                        help="expand at most N nodes before stopping the search")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="save the search frontier to PATH if the search is not finished")
+    parser.add_argument("--split", type=int, default=1, metavar="N",
+                        help="split the saved frontier into up to N snapshots PATH.0, PATH.1, ...")
+    parser.add_argument("--processes", type=int, metavar="N",
+                        help="run the search on N worker processes; the node budget is not used then")
+    parser.add_argument("--split-depth", type=int, default=3, metavar="N",
+                        help="number of mrv levels to expand before the parallel search hands out subproblems")
+    parser.add_argument("--count", action="store_true",
+                        help="count all the solutions instead of stopping at the first one")
+    return parser.parse_args()
+
+def run_resumable_search(args):
+    if args.resume:
+        frontier = load_search_frontier(args.resume)
+    else:
+        frontier = create_search_frontier(load_sudoku(args.search), [ac3_waterfall, waterfall1], count_solutions=args.count)
+    if args.processes:
+        run_parallel_search(frontier, args.processes, args.split_depth)
+    else:
+        run_search_frontier(frontier, args.node_budget)
+
+    print("nodes: ", frontier["nodes"])
+    print("guesses: ", frontier["guesses"])
+    if frontier["count_solutions"]:
+        print("solutions: ", frontier["solution_count"])
+    if frontier["solution"] is not None and is_search_finished(frontier):
+        print("solved: ", True)
+        for row in decode_grid(frontier["solution"]):
+            print(" ".join(str(val+1) for val in row))
+    elif len(frontier["pending"]) == 0:
+        print("solved: ", False)
+    else:
+        print("pending nodes: ", len(frontier["pending"]))
+        if args.snapshot:
+            if args.split > 1:
+                frontiers = split_search_frontier(frontier, args.split)
+                for part in range(len(frontiers)):
+                    save_search_frontier(frontiers[part], args.snapshot + "." + str(part))
+            else:
+                save_search_frontier(frontier, args.snapshot)
+
+
 if __name__ == '__main__':
     sys.setrecursionlimit(20000)
-    solve_all_sudoku()
\ No newline at end of file
+    args = parse_arguments()
+    if args.profile:
+        sudoku = load_sudoku(args.profile)
+        (solved, solved_sudoku, guesses), profile = profile_solve(SOLVE_METHODS[args.method], sudoku, args.flamegraph)
+        print("Puzzle: ", args.profile)
+        print("solved: ", solved)
+        print(args.method + " guesses: ", guesses)
+        print_profile(profile)
+    elif args.search or args.resume:
+        run_resumable_search(args)
+    else:
+        solve_all_sudoku()